@@ -3,17 +3,28 @@ Modularized DigiTwin Analytics Application
 Main application file that orchestrates all modules
 """
 
+import time
+_IMPORT_START = time.perf_counter()
+
 import streamlit as st
-from config import PROMPTS
-from utils import process_uploaded_files, build_faiss_vectorstore
-from llm_models import generate_response
+from config import PROMPTS, MODEL_CONFIGS, WARMUP_MODELS
+from utils import (
+    logger, process_uploaded_files, acquire_vectorstore, get_embeddings,
+    start_background_warmup
+)
+from resource_manager import get_resource_manager, current_session_id
+from llm_models import generate_response, warm_up_local_model, get_router
 from ui_components import (
     setup_ui, setup_sidebar, initialize_session_state, 
-    handle_agent_intro, render_all_tabs
+    handle_agent_intro, render_all_tabs, render_provider_health, render_shared_resources
 )
 
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
 def main():
     """Main application function"""
+    render_start = time.perf_counter()
+    
     # Setup UI
     setup_ui()
     
@@ -22,14 +33,20 @@ def main():
     
     # Setup sidebar and get user inputs
     model_alias, uploaded_files, prompt_type, selected_fpso = setup_sidebar()
+    render_provider_health(get_router().stats())
     
-    # Process uploaded files
-    parsed_docs = []
-    df = None
-    if uploaded_files:
-        parsed_docs, df = process_uploaded_files(uploaded_files)
-        if parsed_docs:  # Only build vectorstore if PDF files were processed
-            st.session_state.vectorstore = build_faiss_vectorstore(parsed_docs)
+    # Process uploaded files; heavy objects are shared across sessions
+    session_id = current_session_id()
+    resource_manager = get_resource_manager()
+    resource_manager.touch_session(session_id)
+    pdf_files, df, notification_index = process_uploaded_files(uploaded_files or [], session_id)
+    if pdf_files:  # Only build vectorstore if PDF files were uploaded
+        st.session_state.vectorstore = acquire_vectorstore(session_id, pdf_files)
+        st.sidebar.success(f"{len(pdf_files)} PDF reports indexed.")
+    else:
+        resource_manager.release(session_id, "vectorstore")
+        st.session_state.vectorstore = None
+    render_shared_resources(resource_manager.stats())
     
     # Handle agent introduction
     handle_agent_intro(model_alias, prompt_type)
@@ -41,11 +58,20 @@ def main():
             model_alias=model_alias,
             prompt_type=prompt_type,
             df=df,
-            vectorstore=st.session_state.vectorstore
+            vectorstore=st.session_state.vectorstore,
+            notification_index=notification_index
         )
     
     # Render all tabs
-    render_all_tabs(df, selected_fpso, generate_response_wrapper)
+    render_all_tabs(df, selected_fpso, generate_response_wrapper, notification_index)
+    
+    # Warm up heavy resources after first paint
+    warmup_tasks = {"embeddings": get_embeddings}
+    for alias in WARMUP_MODELS + [model_alias]:
+        if MODEL_CONFIGS.get(alias, {}).get("provider") == "huggingface":
+            warmup_tasks[f"model:{alias}"] = lambda alias=alias: warm_up_local_model(alias)
+    if start_background_warmup(warmup_tasks):
+        logger.info(f"First paint: imports {_IMPORT_SECONDS:.2f}s, render {time.perf_counter() - render_start:.2f}s")
 
 if __name__ == "__main__":
     main() 
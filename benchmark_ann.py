@@ -0,0 +1,100 @@
+"""
+ANN index benchmark for DigiTwin Analytics
+Measures recall@k, query latency and memory of each FAISS index type against the flat index
+"""
+
+import argparse
+import time
+import numpy as np
+import faiss
+from vector_index import INDEX_TYPES, choose_index_type, create_faiss_index, ivf_nlist
+
+def load_pdf_vectors(paths):
+    """Embed the chunks of the given PDF reports with the app's embedder and splitter"""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from utils import parse_pdf, get_embeddings
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    texts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            texts.extend(splitter.split_text(parse_pdf(f)))
+    return np.asarray(get_embeddings().embed_documents(texts), dtype="float32")
+
+def synthetic_vectors(n_vectors, dim, n_clusters, seed=0):
+    """Clustered unit vectors that roughly mimic sentence-embedding geometry"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    vectors = centers[rng.integers(n_clusters, size=n_vectors)] + 0.5 * rng.normal(size=(n_vectors, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+def index_bytes(index):
+    """Serialized size of an index, a close proxy for its resident memory"""
+    return faiss.serialize_index(index).nbytes
+
+def search_params(index_type, n_vectors):
+    """Parameter sweep for the query-time knob of each index type"""
+    if index_type == "hnsw":
+        return "efSearch", [16, 32, 64, 128, 256]
+    if index_type.startswith("ivf"):
+        nlist = ivf_nlist(n_vectors)
+        return "nprobe", sorted({p for p in [1, 4, 8, 16, 32, 64, 128] if p <= nlist})
+    return None, [None]
+
+def set_search_param(index, name, value):
+    """Apply a query-time parameter to an index"""
+    if name == "efSearch":
+        index.hnsw.efSearch = value
+    elif name == "nprobe":
+        index.nprobe = value
+
+def recall_at_k(ground_truth, found):
+    """Fraction of the exact top-k neighbours returned by the approximate search"""
+    hits = sum(len(set(truth) & set(row)) for truth, row in zip(ground_truth, found))
+    return hits / ground_truth.size
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against exact search")
+    parser.add_argument("--pdf", nargs="*", help="PDF reports to embed (default: synthetic vectors)")
+    parser.add_argument("--vectors", type=int, default=100000, help="number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=384, help="dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5, help="neighbours per query (the app uses k=5)")
+    args = parser.parse_args()
+
+    if args.pdf:
+        vectors = load_pdf_vectors(args.pdf)
+    else:
+        vectors = synthetic_vectors(args.vectors + args.queries, args.dim, n_clusters=max(10, args.vectors // 500))
+    queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    n_vectors, dim = vectors.shape
+
+    flat = faiss.IndexFlatL2(dim)
+    flat.add(vectors)
+    _, ground_truth = flat.search(queries, args.k)
+
+    print(f"{n_vectors} vectors, dim {dim}, {len(queries)} queries, recall@{args.k}; auto picks {choose_index_type(n_vectors, 'auto')}")
+    print(f"{'index':<9} {'param':<13} {'recall':>7} {'ms/query':>9} {'build s':>8} {'MB':>8}")
+    for index_type in INDEX_TYPES:
+        if choose_index_type(n_vectors, index_type) != index_type:
+            continue
+        start = time.perf_counter()
+        index = create_faiss_index(index_type, dim, n_vectors)
+        if not index.is_trained:
+            index.train(vectors)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+        megabytes = index_bytes(index) / 2 ** 20
+
+        param_name, values = search_params(index_type, n_vectors)
+        for value in values:
+            set_search_param(index, param_name, value)
+            start = time.perf_counter()
+            _, found = index.search(queries, args.k)
+            ms_per_query = (time.perf_counter() - start) * 1000 / len(queries)
+            label = f"{param_name}={value}" if param_name else "-"
+            print(f"{index_type:<9} {label:<13} {recall_at_k(ground_truth, found):>7.3f} "
+                  f"{ms_per_query:>9.3f} {build_seconds:>8.1f} {megabytes:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Local inference benchmark for DigiTwin Analytics
+Compares quantized / ONNX CPU backends against the FP16 baseline on a fixed prompt set
+"""
+
+import argparse
+import difflib
+import json
+import time
+from config import MODEL_CONFIGS, PROMPTS
+from llm_models import build_hf_model
+
+BENCHMARK_PROMPTS = [
+    ("Inspector Expert", "Coating breakdown with active corrosion was found on the M112 deck plating. What should be done?"),
+    ("Inspector Expert", "A clamp repair on a firewater line in rack 143 is showing weeping. Recommend the next steps."),
+    ("Backlog Extraction", "NI 2025-03: TBR2 on LQ roof handrail; NC: COA on M120 grating supports; NI: GASK leak at flare KO drum."),
+    ("Daily Report Summarization", "Today the team completed UT thickness checks on the P3 caisson and found two readings below minimum."),
+    ("Complex Reasoning", "Three consecutive days report pitting on the same riser balcony support. How should the anomaly be classified?"),
+]
+
+def build_inputs(tokenizer, prompt_type, question):
+    """Tokenize a benchmark prompt the same way for every backend"""
+    messages = [{"role": "system", "content": PROMPTS[prompt_type]}, {"role": "user", "content": question}]
+    if tokenizer.chat_template:
+        return tokenizer.apply_chat_template(messages, add_generation_prompt=True, return_tensors="pt")
+    return tokenizer(PROMPTS[prompt_type] + "\n\n" + question, return_tensors="pt").input_ids
+
+def run_backend(config, backend, max_new_tokens):
+    """Generate greedily for every benchmark prompt and return per-prompt results"""
+    start = time.perf_counter()
+    tokenizer, model = build_hf_model(config["model_id"], config["api_key_env"], backend)
+    load_seconds = time.perf_counter() - start
+
+    results = []
+    for prompt_type, question in BENCHMARK_PROMPTS:
+        input_ids = build_inputs(tokenizer, prompt_type, question).to(model.device)
+        start = time.perf_counter()
+        output = model.generate(input_ids, max_new_tokens=max_new_tokens, do_sample=False)
+        seconds = time.perf_counter() - start
+        new_tokens = output[0][input_ids.shape[-1]:]
+        results.append({
+            "prompt_type": prompt_type,
+            "seconds": seconds,
+            "new_tokens": len(new_tokens),
+            "token_ids": new_tokens.tolist(),
+            "text": tokenizer.decode(new_tokens, skip_special_tokens=True),
+        })
+    return load_seconds, results
+
+def compare(baseline, candidate):
+    """Token agreement and text similarity of a candidate generation against the baseline"""
+    matching_prefix = 0
+    for base_id, cand_id in zip(baseline["token_ids"], candidate["token_ids"]):
+        if base_id != cand_id:
+            break
+        matching_prefix += 1
+    return {
+        "prefix_agreement": matching_prefix / max(len(baseline["token_ids"]), 1),
+        "text_similarity": difflib.SequenceMatcher(None, baseline["text"], candidate["text"]).ratio(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local inference backends against FP16")
+    parser.add_argument("--agent", default="XAI Inspector", help="HuggingFace agent alias from MODEL_CONFIGS")
+    parser.add_argument("--backends", nargs="+", default=["int8", "onnx"], help="backends to compare with fp16")
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--output", help="write the full report as JSON to this path")
+    args = parser.parse_args()
+
+    config = MODEL_CONFIGS[args.agent]
+    report = {}
+    for backend in ["fp16"] + [b for b in args.backends if b != "fp16"]:
+        load_seconds, results = run_backend(config, backend, args.max_new_tokens)
+        report[backend] = {"load_seconds": load_seconds, "results": results}
+
+    baseline = report["fp16"]["results"]
+    print(f"{args.agent} ({config['model_id']}), {len(BENCHMARK_PROMPTS)} prompts, greedy, {args.max_new_tokens} new tokens")
+    print(f"{'backend':<8} {'load s':>8} {'gen s':>8} {'tok/s':>8} {'prefix agr':>11} {'text sim':>9}")
+    for backend, entry in report.items():
+        results = entry["results"]
+        seconds = sum(r["seconds"] for r in results)
+        tokens = sum(r["new_tokens"] for r in results)
+        scores = [compare(b, r) for b, r in zip(baseline, results)]
+        entry["prefix_agreement"] = sum(s["prefix_agreement"] for s in scores) / len(scores)
+        entry["text_similarity"] = sum(s["text_similarity"] for s in scores) / len(scores)
+        print(f"{backend:<8} {entry['load_seconds']:>8.1f} {seconds:>8.1f} {tokens / seconds:>8.2f} "
+              f"{entry['prefix_agreement']:>11.2f} {entry['text_similarity']:>9.2f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -72,7 +72,8 @@ MODEL_CONFIGS = {
         "api_key_env": "API_KEY",
         "base_url": "https://api.x.ai/v1",
         "model": "grok-3",
-        "stream": True
+        "stream": True,
+        "tools": True
     },
     "JI Divine Agent": {
         "provider": "openai",
@@ -90,7 +91,8 @@ MODEL_CONFIGS = {
     "XAI Inspector": {
         "provider": "huggingface",
         "model_id": "amiguel/GM_Qwen1.8B_Finetune",
-        "api_key_env": "HF_TOKEN"
+        "api_key_env": "HF_TOKEN",
+        "chat_template": True
     },
     "Valonys Llama": {
         "provider": "huggingface",
@@ -99,6 +101,68 @@ MODEL_CONFIGS = {
     }
 }
 
+# --- PROVIDER ROUTING ---
+# Deadlines and circuit breaker for remote agents; hedging starts a request on
+# the next compatible agent when the first token is slower than hedge_after.
+ROUTER_SETTINGS = {
+    "ttft_deadline": float(os.getenv("ROUTER_TTFT_DEADLINE", "20")),
+    "hedging": os.getenv("ROUTER_HEDGING", "false").lower() == "true",
+    "hedge_after": float(os.getenv("ROUTER_HEDGE_AFTER", "6")),
+    "stream_idle_timeout": 60.0,
+    "request_timeout": 120.0,
+    "window": 50,
+    "failure_threshold": 0.5,
+    "min_requests": 4,
+    "cooldown": 60.0
+}
+
+# Compatible agents to fail over / hedge to, in order of preference
+FAILOVER_AGENTS = {
+    "EE Smartest Agent": ["JI Divine Agent", "EdJa-Valonys"],
+    "JI Divine Agent": ["EE Smartest Agent", "EdJa-Valonys"],
+    "EdJa-Valonys": ["EE Smartest Agent", "JI Divine Agent"]
+}
+
+# --- LOCAL INFERENCE ---
+# Backend for HuggingFace agents: "auto" (fp16 on GPU, int8 on CPU), "fp16",
+# "int8" (dynamic int8 quantization of Linear layers on CPU) or "onnx"
+# (ONNX Runtime export, requires optimum[onnxruntime]).
+HF_INFERENCE_BACKEND = os.getenv("HF_INFERENCE_BACKEND", "auto")
+# Intra-op threads for CPU inference; 0 keeps the torch / onnxruntime default.
+HF_NUM_THREADS = int(os.getenv("HF_NUM_THREADS", "0"))
+# Exported ONNX models, one subdirectory per model id, reused across restarts
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", os.path.join("data", "onnx"))
+
+# --- NOTIFICATION STORE ---
+# SQLite file holding enriched notifications across daily uploads
+NOTIFICATION_STORE_PATH = os.getenv("NOTIFICATION_STORE_PATH", os.path.join("data", "notifications.db"))
+
+# --- SHARED RESOURCES ---
+# Memory budget for embedders, models, vectorstores and parsed frames shared
+# across sessions; unused entries are evicted beyond it.
+SHARED_MEMORY_BUDGET_MB = int(os.getenv("SHARED_MEMORY_BUDGET_MB", "8192"))
+# Seconds without a rerun after which a session's shared resources are released
+SESSION_IDLE_TIMEOUT = int(os.getenv("SESSION_IDLE_TIMEOUT", "1800"))
+
+# --- EMBEDDINGS ---
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Chunks embedded and added to the index per step of the PDF pipeline
+EMBEDDING_BATCH_SIZE = 64
+# Rough chunks per PDF page, used to size the index before streaming
+CHUNKS_PER_PAGE_ESTIMATE = 3
+
+# --- VECTOR INDEX ---
+# FAISS index for PDF chunks: "auto", "flat", "ivf_flat", "hnsw" or "ivf_pq".
+# "auto" uses exact search for small corpora and HNSW beyond FLAT_MAX_VECTORS;
+# "ivf_pq" saves memory on large archives at a recall cost (see benchmark_ann.py).
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "auto")
+FLAT_MAX_VECTORS = 20000
+
+# --- WARM-UP ---
+# Agents whose local weights are loaded in the background after first paint,
+# in addition to the currently selected agent (comma separated aliases).
+WARMUP_MODELS = [alias.strip() for alias in os.getenv("WARMUP_MODELS", "").split(",") if alias.strip()]
+
 # --- UI STYLES ---
 UI_STYLES = """
     <style>
@@ -0,0 +1,71 @@
+"""
+Import-time report for DigiTwin Analytics
+Runs `python -X importtime` on the app modules and summarizes the slowest imports
+"""
+
+import argparse
+import subprocess
+import sys
+
+def measure_imports(module):
+    """Import a module in a fresh interpreter and return (module, depth, self_us, cumulative_us) rows"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+def module_subtree(module, rows):
+    """Rows for everything a top-level import of module pulled in, ending with the module itself.
+
+    importtime prints a module after everything it imported, so its subtree is
+    the nested rows between the previous top-level row and its own row.
+    """
+    for end in range(len(rows) - 1, -1, -1):
+        if rows[end][0] == module and rows[end][1] == 0:
+            break
+    else:
+        return []
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    return rows[start:end + 1]
+
+def print_report(module, rows, top):
+    """Print the module's import time, its slowest direct imports and the slowest modules by self time"""
+    subtree = module_subtree(module, rows)
+    if not subtree:
+        print(f"{module}: already imported at interpreter startup, nothing to report")
+        return
+    _, _, own_us, total_us = subtree[-1]
+    print(f"{module}: {total_us / 1e3:.1f} ms cumulative import time ({own_us / 1e3:.1f} ms in the module itself)")
+    print("  slowest direct imports (cumulative):")
+    children = [row for row in subtree if row[1] == 1]
+    for name, _, _, cumulative in sorted(children, key=lambda row: row[3], reverse=True)[:top]:
+        print(f"  {cumulative / 1e3:10.1f} ms  {name}")
+    print("  slowest modules in its import tree (self):")
+    for name, _, self_us, _ in sorted(subtree, key=lambda row: row[2], reverse=True)[:top]:
+        print(f"  {self_us / 1e3:10.1f} ms  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time of the DigiTwin modules")
+    parser.add_argument("modules", nargs="*", default=["config", "utils", "llm_models", "ui_components", "app"])
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        print_report(module, measure_imports(module), args.top)
+
+if __name__ == "__main__":
+    main()
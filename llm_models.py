@@ -3,17 +3,23 @@ LLM Models module for DigiTwin Analytics
 Contains AI model interactions and response generation logic
 """
 
+import json
 import os
 import time
-import openai
-from cerebras.cloud.sdk import Cerebras
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from utils import log_execution
-from config import MODEL_CONFIGS, PROMPTS
+import streamlit as st
+from utils import log_execution, logger
+from config import (
+    MODEL_CONFIGS, PROMPTS, HF_INFERENCE_BACKEND, HF_NUM_THREADS, ONNX_CACHE_DIR, ROUTER_SETTINGS, FAILOVER_AGENTS
+)
+from provider_router import ProviderRouter
+from resource_manager import current_session_id
+from notification_index import QUERY_TOOL, run_query_tool
+# Provider SDKs (openai, cerebras, transformers/torch) are imported inside the
+# handlers so that only the provider actually used pays its import cost.
 
 # --- LLM RESPONSE LOGIC ---
 @log_execution
-def generate_response(prompt, model_alias, prompt_type, df=None, vectorstore=None):
+def generate_response(prompt, model_alias, prompt_type, df=None, vectorstore=None, notification_index=None):
     """Generate response using the selected AI model"""
     messages = [{"role": "system", "content": PROMPTS[prompt_type]}]
     
@@ -30,28 +36,97 @@ def generate_response(prompt, model_alias, prompt_type, df=None, vectorstore=Non
     
     messages.append({"role": "user", "content": prompt})
     full_response = ""
+    # Captured here because agents run in router threads outside the Streamlit session
+    session_id = current_session_id()
 
     try:
         config = MODEL_CONFIGS[model_alias]
-        
-        if config["provider"] == "openai":
-            return _handle_openai_response(config, messages)
-        elif config["provider"] == "cerebras":
-            return _handle_cerebras_response(config, messages)
-        elif config["provider"] == "huggingface":
-            return _handle_huggingface_response(config, messages, prompt_type, prompt)
-        else:
-            yield f"<span style='color:red'>⚠️ Error: Unknown provider {config['provider']}</span>"
+        yield from get_router().stream(
+            model_alias,
+            lambda alias: _provider_stream(alias, messages, prompt_type, prompt, session_id, notification_index),
+            fallbacks=FAILOVER_AGENTS.get(model_alias, []),
+            deadlines=config["provider"] != "huggingface",
+            hedge=ROUTER_SETTINGS["hedging"]
+        )
             
     except Exception as e:
         yield f"<span style='color:red'>⚠️ Error: {str(e)}</span>"
 
-def _handle_openai_response(config, messages):
+@st.cache_resource
+def get_router():
+    """Process-wide provider router, so health stats are shared by all sessions"""
+    return ProviderRouter(
+        ttft_deadline=ROUTER_SETTINGS["ttft_deadline"],
+        hedge_after=ROUTER_SETTINGS["hedge_after"],
+        stream_idle_timeout=ROUTER_SETTINGS["stream_idle_timeout"],
+        window=ROUTER_SETTINGS["window"],
+        failure_threshold=ROUTER_SETTINGS["failure_threshold"],
+        min_requests=ROUTER_SETTINGS["min_requests"],
+        cooldown=ROUTER_SETTINGS["cooldown"]
+    )
+
+def _provider_stream(model_alias, messages, prompt_type, prompt, session_id=None, notification_index=None):
+    """Dispatch a request to the handler of the agent's provider"""
+    config = MODEL_CONFIGS[model_alias]
+    if config["provider"] == "openai":
+        return _handle_openai_response(config, messages, notification_index)
+    elif config["provider"] == "cerebras":
+        return _handle_cerebras_response(config, messages)
+    elif config["provider"] == "huggingface":
+        return _handle_huggingface_response(config, messages, prompt_type, prompt, session_id)
+    raise ValueError(f"Unknown provider {config['provider']}")
+
+def _handle_openai_response(config, messages, notification_index=None):
     """Handle OpenAI-based model responses"""
+    import openai
     client = openai.OpenAI(
         api_key=os.getenv(config["api_key_env"]), 
-        base_url=config["base_url"]
+        base_url=config["base_url"],
+        timeout=ROUTER_SETTINGS["request_timeout"]
     )
+    
+    # Agents with tool support may query the notification index before answering.
+    # The first request streams too, so a direct answer starts within the router's first-token deadline.
+    if notification_index is not None and config.get("tools"):
+        response = client.chat.completions.create(
+            model=config["model"], 
+            messages=messages, 
+            tools=[QUERY_TOOL],
+            stream=True
+        )
+        content = ""
+        tool_calls = {}  # index -> {"id", "name", "arguments"} assembled from deltas
+        for chunk in response:
+            if not chunk.choices or not chunk.choices[0].delta:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content += delta.content
+                yield f"<span style='font-family:Tw Cen MT'>{delta.content}</span>"
+            for call in delta.tool_calls or []:
+                entry = tool_calls.setdefault(call.index, {"id": "", "name": "", "arguments": ""})
+                entry["id"] = call.id or entry["id"]
+                if call.function:
+                    entry["name"] += call.function.name or ""
+                    entry["arguments"] += call.function.arguments or ""
+        if not tool_calls:
+            return
+        calls = [tool_calls[index] for index in sorted(tool_calls)]
+        messages = messages + [{
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [
+                {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                for call in calls
+            ]
+        }]
+        for call in calls:
+            if call["name"] == QUERY_TOOL["function"]["name"]:
+                result = run_query_tool(notification_index, call["arguments"])
+            else:
+                result = json.dumps({"error": f"Unknown tool {call['name']}"})
+            messages.append({"role": "tool", "tool_call_id": call["id"], "content": result})
+    
     response = client.chat.completions.create(
         model=config["model"], 
         messages=messages, 
@@ -65,7 +140,8 @@ def _handle_openai_response(config, messages):
 
 def _handle_cerebras_response(config, messages):
     """Handle Cerebras model responses"""
-    client = Cerebras(api_key=os.getenv(config["api_key_env"]))
+    from cerebras.cloud.sdk import Cerebras
+    client = Cerebras(api_key=os.getenv(config["api_key_env"]), timeout=ROUTER_SETTINGS["request_timeout"])
     response = client.chat.completions.create(
         model=config["model"], 
         messages=messages
@@ -76,27 +152,189 @@ def _handle_cerebras_response(config, messages):
         yield f"<span style='font-family:Tw Cen MT'>{word} </span>"
         time.sleep(0.01)
 
-def _handle_huggingface_response(config, messages, prompt_type, prompt):
-    """Handle HuggingFace model responses"""
-    model_id = config["model_id"]
+def resolve_inference_backend(config):
+    """Pick the local inference backend for a HuggingFace agent"""
+    backend = config.get("inference_backend", HF_INFERENCE_BACKEND)
+    if backend == "auto":
+        import torch
+        backend = "fp16" if torch.cuda.is_available() else "int8"
+    if backend not in ("fp16", "int8", "onnx"):
+        raise ValueError(f"Unknown inference backend {backend}")
+    return backend
+
+def load_hf_model(model_id, api_key_env, backend="fp16", session_id=None, slot="local_model"):
+    """Return a HuggingFace tokenizer and model shared by all sessions, held for session_id in slot if given"""
+    from resource_manager import get_resource_manager
+    key = ("hf_model", model_id, backend)
+    factory = lambda: build_hf_model(model_id, api_key_env, backend)
+    if session_id is None:
+        return get_resource_manager().get(key, factory, "model")
+    return get_resource_manager().acquire(session_id, slot, key, factory, "model")
+
+def build_hf_model(model_id, api_key_env, backend="fp16"):
+    """Load a HuggingFace tokenizer and model with the given inference backend"""
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+    token = os.getenv(api_key_env)
     tokenizer = AutoTokenizer.from_pretrained(
         model_id, 
         trust_remote_code=True, 
-        token=os.getenv(config["api_key_env"])
-    )
-    model = AutoModelForCausalLM.from_pretrained(
-        model_id, 
-        trust_remote_code=True, 
-        device_map="auto", 
-        token=os.getenv(config["api_key_env"])
+        token=token
     )
     
-    if "XAI Inspector" in config["model_id"]:
+    if backend == "onnx":
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError:
+            raise ImportError("The 'onnx' inference backend requires optimum[onnxruntime]")
+        session_options = onnxruntime.SessionOptions()
+        if HF_NUM_THREADS:
+            session_options.intra_op_num_threads = HF_NUM_THREADS
+        # The export is slow and large, so it runs once per model id and is loaded from disk afterwards
+        export_dir = os.path.join(ONNX_CACHE_DIR, model_id.replace("/", "--"))
+        if not os.path.isfile(os.path.join(export_dir, "config.json")):
+            logger.info(f"Exporting {model_id} to ONNX in {export_dir}")
+            model = ORTModelForCausalLM.from_pretrained(
+                model_id, 
+                export=True, 
+                trust_remote_code=True, 
+                token=token
+            )
+            model.save_pretrained(export_dir)
+            del model
+        model = ORTModelForCausalLM.from_pretrained(
+            export_dir, 
+            export=False, 
+            trust_remote_code=True, 
+            session_options=session_options
+        )
+        return tokenizer, model
+    
+    import torch
+    if HF_NUM_THREADS:
+        torch.set_num_threads(HF_NUM_THREADS)
+    
+    if backend == "int8":
+        # Dynamic quantization runs on CPU from float32 weights
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id, 
+            trust_remote_code=True, 
+            torch_dtype=torch.float32, 
+            low_cpu_mem_usage=True, 
+            token=token
+        )
+        # In place, so peak memory stays at one copy of the float32 weights
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    else:
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id, 
+            trust_remote_code=True, 
+            torch_dtype=torch.float16, 
+            device_map="auto", 
+            token=token
+        )
+    model.eval()
+    return tokenizer, model
+
+def _encode_system_prefix(tokenizer, prompt_type, use_chat_template):
+    """Token ids of the fixed system prompt as they appear at the start of every input"""
+    if use_chat_template and tokenizer.chat_template:
+        prefix_text = tokenizer.apply_chat_template(
+            [{"role": "system", "content": PROMPTS[prompt_type]}], tokenize=False
+        )
+        return tokenizer(prefix_text, add_special_tokens=False, return_tensors="pt").input_ids
+    return tokenizer(PROMPTS[prompt_type], return_tensors="pt").input_ids
+
+def supports_prefix_cache(model):
+    """Whether generate() continues from a partial past_key_values by cache_position.
+
+    Remote-code models (e.g. Qwen-1) keep only the last input token whenever a
+    cache is passed, so they would never see the question.
+    """
+    return type(model).__module__.startswith("transformers.models.")
+
+def get_prefix_caches(model_id, api_key_env, backend, use_chat_template, session_id=None, slot="local_prefix_caches"):
+    """Attention key/value caches of every system prompt, precomputed once per model and shared across sessions.
+
+    Returns {prompt_type: (prefix_ids, past_key_values)}, held for session_id in slot if given,
+    so the caches stay resident as long as the model they belong to. Empty for models
+    that cannot resume from a prefix cache.
+    """
+    from resource_manager import get_resource_manager
+    
+    def _build():
+        import torch
+        tokenizer, model = load_hf_model(model_id, api_key_env, backend)
+        caches = {}
+        if not supports_prefix_cache(model):
+            return caches
+        for prompt_type in PROMPTS:
+            prefix_ids = _encode_system_prefix(tokenizer, prompt_type, use_chat_template)
+            with torch.no_grad():
+                outputs = model(prefix_ids.to(model.device), use_cache=True)
+            caches[prompt_type] = (prefix_ids[0].tolist(), outputs.past_key_values)
+        return caches
+    
+    key = ("prefix_caches", model_id, backend, use_chat_template)
+    if session_id is None:
+        return get_resource_manager().get(key, _build, "kv_cache")
+    return get_resource_manager().acquire(session_id, slot, key, _build, "kv_cache")
+
+def warm_up_local_model(model_alias):
+    """Preload weights and system-prompt caches for a local (HuggingFace) agent; remote agents are a no-op.
+
+    They are held by the warm-up holder, which is released like an idle session, so
+    they are not evicted before the first request uses them.
+    """
+    from resource_manager import WARMUP_HOLDER
+    config = MODEL_CONFIGS.get(model_alias)
+    if config and config["provider"] == "huggingface":
+        backend = resolve_inference_backend(config)
+        load_hf_model(config["model_id"], config["api_key_env"], backend, WARMUP_HOLDER, f"{model_alias}:model")
+        if backend != "onnx":
+            get_prefix_caches(
+                config["model_id"], config["api_key_env"], backend, config.get("chat_template", False),
+                WARMUP_HOLDER, f"{model_alias}:prefix_caches"
+            )
+
+def _handle_huggingface_response(config, messages, prompt_type, prompt, session_id=None):
+    """Handle HuggingFace model responses"""
+    import copy
+    import torch
+    backend = resolve_inference_backend(config)
+    tokenizer, model = load_hf_model(config["model_id"], config["api_key_env"], backend, session_id)
+    # Remote-code tokenizers (e.g. Qwen-1) may not ship a chat template
+    use_chat_template = config.get("chat_template", False) and bool(tokenizer.chat_template)
+    
+    caches = {}
+    if backend != "onnx":
+        caches = get_prefix_caches(
+            config["model_id"], config["api_key_env"], backend, config.get("chat_template", False), session_id
+        )
+    if prompt_type in caches:
+        prefix_ids, past_key_values = caches[prompt_type]
+    else:
+        prefix_ids, past_key_values = _encode_system_prefix(tokenizer, prompt_type, use_chat_template)[0].tolist(), None
+    
+    if use_chat_template:  # XAI Inspector
         input_ids = tokenizer.apply_chat_template(messages, return_tensors="pt").to(model.device)
-        output = model.generate(input_ids, max_new_tokens=512, do_sample=True, top_p=0.9)
-    else:  # Valonys Llama
-        input_ids = tokenizer(PROMPTS[prompt_type] + "\n\n" + prompt, return_tensors="pt").to(model.device)
-        output = model.generate(**input_ids, max_new_tokens=512)
+        generate_kwargs = {"max_new_tokens": 512, "do_sample": True, "top_p": 0.9}
+    else:  # Valonys Llama, and chat agents whose tokenizer has no template
+        # Appended to the cached prefix ids so the prefix matches by construction
+        prompt_ids = tokenizer("\n\n" + prompt, add_special_tokens=False).input_ids
+        input_ids = torch.tensor([prefix_ids + prompt_ids]).to(model.device)
+        generate_kwargs = {"max_new_tokens": 512}
+    
+    # Reuse the precomputed system-prompt cache so prefill only covers the rest of the input.
+    # The cache is copied because generate() extends it in place.
+    if past_key_values is not None:
+        if len(prefix_ids) < input_ids.shape[-1] and input_ids[0, :len(prefix_ids)].tolist() == prefix_ids:
+            generate_kwargs["past_key_values"] = copy.deepcopy(past_key_values)
+        else:
+            logger.debug(f"System-prompt cache miss for {config['model_id']} ({prompt_type}): input does not start with the cached prefix")
+    
+    with torch.no_grad():
+        output = model.generate(input_ids, attention_mask=torch.ones_like(input_ids), **generate_kwargs)
     
     decoded = tokenizer.decode(output[0], skip_special_tokens=True)
-    yield f"<span style='font-family:Tw Cen MT'>{decoded}</span>" 
\ No newline at end of file
+    yield f"<span style='font-family:Tw Cen MT'>{decoded}</span>"
@@ -0,0 +1,109 @@
+"""
+Multi-session load test for DigiTwin Analytics
+Simulates N concurrent sessions uploading reports and querying them through the shared resource layer
+"""
+
+import argparse
+import io
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from resource_manager import get_resource_manager
+from utils import acquire_vectorstore, acquire_notifications, get_embeddings
+
+PDF_TYPE = "application/pdf"
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+QUERIES = [
+    "coating breakdown on module deck", "clamp repair weeping", "backlog of NC notifications",
+    "corrosion under insulation", "handrail replacement on living quarters", "flare structure inspection",
+]
+
+class LocalUpload(io.BytesIO):
+    """Stand-in for a Streamlit UploadedFile backed by a local file"""
+
+    def __init__(self, path, file_type, tag=""):
+        with open(path, "rb") as f:
+            # A per-session tag makes otherwise identical uploads distinct (no sharing)
+            super().__init__(f.read() + tag.encode())
+        self.name = os.path.basename(path)
+        self.type = file_type
+
+def rss_mb():
+    """Current resident set size of this process in MB (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+def run_session(session_id, args, timings, lock):
+    """One simulated session: upload its files, then ask a series of questions"""
+    tag = "" if args.shared else f"\n%session {session_id}\n"
+    pdf_path = args.pdf[session_id % len(args.pdf)]
+
+    start = time.perf_counter()
+    vectorstore = acquire_vectorstore(session_id, [LocalUpload(pdf_path, PDF_TYPE, tag)])
+    notification_index = None
+    if args.xlsx:
+        _, notification_index = acquire_notifications(session_id, LocalUpload(args.xlsx, XLSX_TYPE, tag))
+    setup_seconds = time.perf_counter() - start
+
+    query_seconds = []
+    for _ in range(args.queries):
+        start = time.perf_counter()
+        vectorstore.similarity_search(random.choice(QUERIES), k=5)
+        query_seconds.append(time.perf_counter() - start)
+        time.sleep(args.think_time)
+
+    drilldown_seconds = []
+    if notification_index is not None:
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            notification_index.rows(notif_type="NC", fpso=random.choice(["GIR", "DAL", "PAZ", "CLV"]), keyword="COA")
+            drilldown_seconds.append(time.perf_counter() - start)
+
+    with lock:
+        timings["setup"].append(setup_seconds)
+        timings["query"].extend(query_seconds)
+        timings["drilldown"].extend(drilldown_seconds)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions against the shared resource layer")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--pdf", nargs="+", required=True, help="PDF reports; sessions upload them round-robin")
+    parser.add_argument("--xlsx", help="optional Global Notifications export uploaded by every session")
+    parser.add_argument("--queries", type=int, default=10, help="questions per session")
+    parser.add_argument("--think-time", type=float, default=0.1, help="seconds between questions")
+    parser.add_argument("--no-sharing", dest="shared", action="store_false",
+                        help="make every session's upload unique to measure the unshared baseline")
+    args = parser.parse_args()
+
+    baseline_mb = rss_mb()
+    get_embeddings()
+    embedder_mb = rss_mb()
+
+    timings = {"setup": [], "query": [], "drilldown": []}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for future in [pool.submit(run_session, sid, args, timings, lock) for sid in range(args.sessions)]:
+            future.result()
+    wall_seconds = time.perf_counter() - start
+
+    stats = get_resource_manager().stats()
+    print(f"{args.sessions} sessions, {len(args.pdf)} distinct PDFs, sharing {'on' if args.shared else 'off'}, {wall_seconds:.1f}s wall")
+    print(f"RSS: {baseline_mb:.0f} MB at start, {embedder_mb:.0f} MB with embedder, {rss_mb():.0f} MB after load")
+    print(f"Accounted shared memory: {stats['total_bytes'] / 2 ** 20:.0f} MB in {len(stats['entries'])} entries")
+    for entry in stats["entries"]:
+        print(f"  {entry['kind']:<12} sessions={entry['sessions']:<4} {entry['bytes'] / 2 ** 20:8.1f} MB  {entry['key'][:70]}")
+    for name, values in timings.items():
+        if not values:
+            continue
+        print(f"{name:<9} latency p50 {percentile(values, 0.5) * 1000:8.1f} ms  p95 {percentile(values, 0.95) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
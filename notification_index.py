@@ -0,0 +1,133 @@
+"""
+Notification index module for DigiTwin Analytics
+Inverted index from FPSO, type, month, keyword and location to notification rows
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+LOCATION_COLUMNS = ['Extracted_Modules', 'Extracted_Racks', 'Extracted_LivingQuarters',
+                    'Extracted_Flare', 'Extracted_FWD', 'Extracted_HeliDeck']
+FIELDS = ('fpso', 'notif_type', 'month', 'keyword', 'location')
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+def _single_valued_postings(values):
+    """value -> sorted row positions for a column holding one value per row"""
+    return {value: positions.astype(np.int64) for value, positions in values.groupby(values.to_numpy()).indices.items()}
+
+def _multi_valued_postings(columns):
+    """value -> sorted row positions for comma-separated keyword columns"""
+    exploded = pd.concat([col.str.split(', ').explode() for col in columns])
+    exploded = exploded[exploded.notna() & (exploded != 'None')]
+    rows = exploded.index.to_numpy()
+    return {value: np.unique(rows[idx]) for value, idx in exploded.groupby(exploded.to_numpy()).indices.items()}
+
+class NotificationIndex:
+    """Precomputed postings over an enriched notifications frame.
+
+    Filters on the same field are OR-ed, filters on different fields are AND-ed,
+    so "NC with COA on M112 in 2025-03 at PAZ" is a handful of array intersections
+    instead of full-frame string scans.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        frame = df.reset_index(drop=True)
+        self.postings = {
+            'fpso': _single_valued_postings(frame['FPSO'].astype(str)),
+            'notif_type': _single_valued_postings(frame['Notifictn type'].astype(str)),
+            'month': _single_valued_postings(pd.to_datetime(frame['Created on'], errors='coerce').dt.strftime('%Y-%m').fillna('')),
+            'keyword': _multi_valued_postings([frame['Extracted_Keywords'].astype(str)]),
+            'location': _multi_valued_postings([frame[col].astype(str) for col in LOCATION_COLUMNS]),
+        }
+        self.postings['month'].pop('', None)
+
+    @property
+    def nbytes(self):
+        return sum(positions.nbytes for postings in self.postings.values() for positions in postings.values())
+
+    def values(self, field):
+        """Sorted distinct values of a field, e.g. for filter widgets"""
+        return sorted(self.postings[field])
+
+    def query(self, **filters):
+        """Row positions matching all filters; each filter is a value or a list of values"""
+        matches = None
+        for field, wanted in filters.items():
+            if field not in FIELDS:
+                raise ValueError(f"Unknown notification field {field}")
+            if wanted is None or (isinstance(wanted, (list, tuple, set)) and not wanted):
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            postings = self.postings[field]
+            positions = np.unique(np.concatenate([postings.get(str(value), _EMPTY) for value in wanted]))
+            matches = positions if matches is None else np.intersect1d(matches, positions, assume_unique=True)
+            if not len(matches):
+                break
+        return np.arange(len(self.df)) if matches is None else matches
+
+    def rows(self, **filters):
+        """Notification rows matching all filters"""
+        return self.df.iloc[self.query(**filters)]
+
+    def count(self, **filters):
+        return len(self.query(**filters))
+
+# --- LLM TOOL ---
+DEFAULT_TOOL_LIMIT = 20
+MAX_TOOL_LIMIT = 200
+
+QUERY_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "query_notifications",
+        "description": (
+            "Exact count and matching rows of uploaded inspection notifications. Values within one "
+            "filter are OR-ed, different filters are AND-ed. Use this for any counting or listing question."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "fpso": {"type": "array", "items": {"type": "string", "enum": ["GIR", "DAL", "PAZ", "CLV"]}},
+                "notif_type": {"type": "array", "items": {"type": "string", "enum": ["NI", "NC"]}},
+                "month": {"type": "array", "items": {"type": "string"}, "description": "Months as YYYY-MM"},
+                "keyword": {"type": "array", "items": {"type": "string"}, "description": "NI/NC keywords such as COA, WELD, TBR, CLMP"},
+                "location": {"type": "array", "items": {"type": "string"}, "description": "Locations such as M112, 143, LQ, P3, R2, FWD, HELIDECK"},
+                "limit": {"type": "integer", "minimum": 1, "maximum": 200,
+                          "description": "Maximum rows to return (default 20)"}
+            }
+        }
+    }
+}
+
+def run_query_tool(index, arguments):
+    """Execute a query_notifications tool call and return its JSON result.
+
+    Malformed arguments from the model are reported back to it as an error result.
+    """
+    try:
+        arguments = json.loads(arguments) if isinstance(arguments, str) else dict(arguments)
+        if not isinstance(arguments, dict):
+            raise TypeError("arguments must be a JSON object")
+        limit = arguments.pop("limit", None)
+        limit = DEFAULT_TOOL_LIMIT if limit is None else int(limit)
+        if not 1 <= limit <= MAX_TOOL_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_TOOL_LIMIT}")
+        positions = index.query(**arguments)
+    except (ValueError, TypeError) as e:
+        return json.dumps({"error": f"Invalid query_notifications arguments: {e}"})
+    rows = index.df.iloc[positions[:limit]]
+    records = [
+        {
+            "created_on": str(row['Created on'])[:10],
+            "fpso": row['FPSO'],
+            "type": row['Notifictn type'],
+            "description": str(row['Description']),
+            "keywords": row['Extracted_Keywords'],
+            "locations": ", ".join(row[col] for col in LOCATION_COLUMNS if row[col] != 'None') or 'None',
+        }
+        for _, row in rows.iterrows()
+    ]
+    return json.dumps({"count": int(len(positions)), "rows": records})
@@ -0,0 +1,148 @@
+"""
+Notification store module for DigiTwin Analytics
+Persists enriched notifications in SQLite and ingests only new or changed rows
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns as they appear in the processed notifications frame
+BASE_COLUMNS = ['Notifictn type', 'Created on', 'Description', 'FPSO']
+ENRICHED_COLUMNS = ['Extracted_Keywords', 'Extracted_Modules', 'Extracted_Racks', 'Extracted_LivingQuarters',
+                    'Extracted_Flare', 'Extracted_FWD', 'Extracted_HeliDeck']
+# Optional notification number column used as identity when the export has it
+ID_COLUMN = 'Notification'
+
+_SQL_COLUMNS = {
+    'Notifictn type': 'notif_type', 'Created on': 'created_on', 'Description': 'description', 'FPSO': 'fpso',
+    **{col: col.lower() for col in ENRICHED_COLUMNS}
+}
+
+def _digest(*parts):
+    """Stable short hash of string parts"""
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+def notification_number(value):
+    """Notification number as text, or None for a blank cell; 1001.0 and 1001 give the same number"""
+    if pd.isna(value) or not str(value).strip():
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def notification_keys(df):
+    """Identity of each row: notification number (or type/FPSO/description when blank) plus 'Created on'"""
+    created_on = created_on_text(df['Created on'])
+    numbers = df[ID_COLUMN] if ID_COLUMN in df.columns else [None] * len(df)
+    identity = [
+        notification_number(n) or _digest(str(t), str(f), str(d))
+        for n, t, f, d in zip(numbers, df['Notifictn type'], df['FPSO'], df['Description'])
+    ]
+    return [f"{i}|{c}" for i, c in zip(identity, created_on)]
+
+def content_hashes(df, enrich_version=""):
+    """Hash of the fields and enrichment version that feed the enrichment, used to detect changed rows"""
+    return [_digest(enrich_version, *map(str, row)) for row in zip(df['Notifictn type'], df['FPSO'], df['Description'])]
+
+def created_on_text(series):
+    """Normalize 'Created on' to a sortable text form for storage and keys"""
+    return pd.to_datetime(series, errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S').fillna('')
+
+class NotificationStore:
+    """Append-only SQLite store of enriched notifications, partitioned by FPSO and month.
+
+    ``sync`` enriches only rows whose key is new or whose content or enrichment
+    version changed, and reuses the stored enrichment for all other rows.
+    """
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        enriched = ", ".join(f"{_SQL_COLUMNS[col]} TEXT" for col in ENRICHED_COLUMNS)
+        with self._conn:
+            self._conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS notifications (
+                    notif_key TEXT PRIMARY KEY, content_hash TEXT, month TEXT,
+                    notif_type TEXT, created_on TEXT, description TEXT, fpso TEXT, {enriched}
+                );
+                CREATE INDEX IF NOT EXISTS idx_notifications_partition ON notifications (fpso, month);
+            """)
+
+    def sync(self, df, enrich, enrich_version=""):
+        """Ingest a notifications frame and return it enriched, in the original row order.
+
+        ``enrich`` takes a frame with BASE_COLUMNS and returns it with ENRICHED_COLUMNS added;
+        it is only called on the rows that are new or changed since the last sync.
+        ``enrich_version`` identifies the enrichment rules, so changing it re-enriches stored rows.
+        """
+        df = df.reset_index(drop=True)
+        unnumbered = len(df) if ID_COLUMN not in df.columns else int(df[ID_COLUMN].map(notification_number).isna().sum())
+        if unnumbered:
+            logger.warning(f"{unnumbered} rows have no '{ID_COLUMN}' number; their edited descriptions are stored as new rows, not changes")
+        keys = notification_keys(df)
+        hashes = content_hashes(df, enrich_version)
+
+        with self._lock:
+            stored = self._fetch(keys, ['notif_key', 'content_hash'])
+            stored = stored.set_index('notif_key') if not stored.empty else stored
+            # Only the first occurrence of a key is ingested when an export repeats a row
+            seen = set()
+            is_delta = []
+            for key, content_hash in zip(keys, hashes):
+                is_delta.append(key not in seen and (key not in stored.index or stored.at[key, 'content_hash'] != content_hash))
+                seen.add(key)
+            if len(seen) < len(keys):
+                logger.warning(f"{len(keys) - len(seen)} rows repeat an earlier row's identity and are read back as that row")
+            delta = df[is_delta]
+            logger.info(f"Notification sync: {len(delta)} new or changed of {len(df)} rows")
+
+            if not delta.empty:
+                enriched = enrich(delta[BASE_COLUMNS].copy())
+                delta_keys = [k for k, d in zip(keys, is_delta) if d]
+                delta_hashes = [h for h, d in zip(hashes, is_delta) if d]
+                self._write(enriched, delta_keys, delta_hashes)
+
+            result = self._fetch(keys, ['notif_key'] + list(_SQL_COLUMNS.values()))
+
+        result = result.set_index('notif_key').loc[keys].reset_index(drop=True)
+        result = result.rename(columns={v: k for k, v in _SQL_COLUMNS.items()})
+        result['Created on'] = pd.to_datetime(result['Created on'], errors='coerce')
+        result.index = df.index
+        return result[BASE_COLUMNS + ENRICHED_COLUMNS]
+
+    def _fetch(self, keys, columns):
+        """Fetch stored rows for the given keys through a temporary key table"""
+        with self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS sync_keys (notif_key TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM sync_keys")
+            self._conn.executemany("INSERT OR IGNORE INTO sync_keys VALUES (?)", ((k,) for k in keys))
+        selected = ", ".join(f"n.{col}" for col in columns)
+        return pd.read_sql_query(
+            f"SELECT {selected} FROM notifications n JOIN sync_keys USING (notif_key)", self._conn
+        )
+
+    def _write(self, enriched, keys, hashes):
+        """Upsert enriched rows"""
+        created_on = created_on_text(enriched['Created on'])
+        rows = []
+        for (_, row), key, content_hash, created in zip(enriched.iterrows(), keys, hashes, created_on):
+            rows.append((key, content_hash, created[:7], row['Notifictn type'], created, row['Description'], row['FPSO'],
+                         *(row[col] for col in ENRICHED_COLUMNS)))
+
+        columns = ['notif_key', 'content_hash', 'month', 'notif_type', 'created_on', 'description', 'fpso'] + \
+                  [_SQL_COLUMNS[col] for col in ENRICHED_COLUMNS]
+        updates = ", ".join(f"{col} = excluded.{col}" for col in columns[1:])
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO notifications ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (notif_key) DO UPDATE SET {updates}",
+                rows
+            )
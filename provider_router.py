@@ -0,0 +1,224 @@
+"""
+Provider router module for DigiTwin Analytics
+Tracks per-agent latency and errors, enforces time-to-first-token deadlines,
+hedges slow requests and fails over around unhealthy backends
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from utils import logger
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised when no agent could produce a first token"""
+
+class ProviderHealth:
+    """Rolling latency / error window and circuit breaker for one agent"""
+
+    def __init__(self, window, failure_threshold, min_requests, cooldown):
+        self.ttfts = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trial_started = None
+        self.last_error = None
+
+    def allow_request(self, now):
+        """Whether a request may be sent; an open breaker lets one trial through after the cooldown"""
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self.trial_started = None
+        if self.state == HALF_OPEN:
+            # A trial that never reported back (e.g. a cancelled hedge) expires after the cooldown
+            if self.trial_started is not None and now - self.trial_started < self.cooldown:
+                return False
+            self.trial_started = now
+            return True
+        return self.state == CLOSED
+
+    def record_success(self, ttft):
+        self.ttfts.append(ttft)
+        self.outcomes.append(True)
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self.outcomes.clear()
+            self.outcomes.append(True)
+
+    def record_failure(self, error, now):
+        self.outcomes.append(False)
+        self.last_error = error
+        failures = self.outcomes.count(False)
+        if self.state == HALF_OPEN or (
+            len(self.outcomes) >= self.min_requests and failures / len(self.outcomes) >= self.failure_threshold
+        ):
+            self.state = OPEN
+            self.opened_at = now
+
+    def snapshot(self):
+        ttfts = sorted(self.ttfts)
+        percentile = lambda q: ttfts[min(len(ttfts) - 1, int(q * len(ttfts)))] if ttfts else None
+        return {
+            "state": self.state,
+            "requests": len(self.outcomes),
+            "error_rate": self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0,
+            "ttft_p50": percentile(0.5),
+            "ttft_p95": percentile(0.95),
+            "last_error": self.last_error,
+        }
+
+class ProviderRouter:
+    """Routes a request to an agent, hedging to and failing over between compatible agents.
+
+    Each attempt runs in a daemon thread that feeds a shared queue; the caller
+    streams from whichever attempt produces the first chunk. Once output has
+    started the request is committed to that agent.
+    """
+
+    def __init__(self, ttft_deadline, hedge_after, stream_idle_timeout, window, failure_threshold, min_requests, cooldown):
+        self.ttft_deadline = ttft_deadline
+        self.hedge_after = hedge_after
+        self.stream_idle_timeout = stream_idle_timeout
+        self._health_args = (window, failure_threshold, min_requests, cooldown)
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def _get_health(self, alias):
+        if alias not in self._health:
+            self._health[alias] = ProviderHealth(*self._health_args)
+        return self._health[alias]
+
+    def stats(self):
+        """Snapshot of per-agent health for display"""
+        with self._lock:
+            return {alias: health.snapshot() for alias, health in self._health.items()}
+
+    def _allow(self, alias):
+        with self._lock:
+            return self._get_health(alias).allow_request(time.monotonic())
+
+    def _record_success(self, alias, ttft):
+        with self._lock:
+            self._get_health(alias).record_success(ttft)
+
+    def _record_failure(self, alias, error):
+        logger.warning(f"Agent {alias} failed: {error}")
+        with self._lock:
+            self._get_health(alias).record_failure(error, time.monotonic())
+
+    def _launch(self, alias, open_stream, results, cancelled):
+        """Start streaming from an agent in a background thread"""
+        def _run():
+            try:
+                stream = open_stream(alias)
+                for chunk in stream:
+                    if cancelled.is_set():
+                        stream.close()
+                        return
+                    results.put((alias, "chunk", chunk))
+                results.put((alias, "done", None))
+            except Exception as e:
+                results.put((alias, "error", str(e)))
+
+        threading.Thread(target=_run, name=f"digitwin-agent-{alias}", daemon=True).start()
+        return time.monotonic()
+
+    def stream(self, primary, open_stream, fallbacks=(), deadlines=True, hedge=False):
+        """Yield chunks for a request, starting with the primary agent.
+
+        ``open_stream(alias)`` returns the chunk generator for an agent. ``fallbacks``
+        are compatible agents tried when the current one errors, misses the
+        time-to-first-token deadline or has an open circuit breaker; with ``hedge``
+        the next fallback also starts when the first token is slower than hedge_after.
+        Without ``deadlines`` (local agents) only errors trigger failover.
+        """
+        candidates = [primary, *fallbacks]
+        results = queue.Queue()
+        cancelled = {}
+        started = {}
+        failed = set()
+        winner = None
+
+        def launch_next():
+            """Start the next candidate whose circuit breaker allows a request"""
+            while candidates:
+                alias = candidates.pop(0)
+                if self._allow(alias):
+                    cancelled[alias] = threading.Event()
+                    started[alias] = self._launch(alias, open_stream, results, cancelled[alias])
+                    return True
+            return False
+
+        try:
+            if not launch_next():
+                raise ProviderUnavailableError(f"All agents for {primary} are unavailable (circuit open)")
+            while winner is None:
+                active = [alias for alias in started if alias not in failed]
+                timers = []
+                if deadlines:
+                    timers.append(min(started[alias] for alias in active) + self.ttft_deadline)
+                    if hedge and candidates and len(active) == 1:
+                        timers.append(started[active[0]] + self.hedge_after)
+                try:
+                    timeout = max(0.0, min(timers) - time.monotonic()) if timers else None
+                    alias, kind, payload = results.get(timeout=timeout)
+                except queue.Empty:
+                    now = time.monotonic()
+                    for alias in active:
+                        if now - started[alias] >= self.ttft_deadline:
+                            cancelled[alias].set()
+                            failed.add(alias)
+                            self._record_failure(alias, f"no first token within {self.ttft_deadline:g}s")
+                    active = [alias for alias in started if alias not in failed]
+                    if not active:
+                        if not launch_next():
+                            raise ProviderUnavailableError(f"No agent answered within {self.ttft_deadline:g}s")
+                    elif hedge and len(active) == 1 and now - started[active[0]] >= self.hedge_after:
+                        launch_next()
+                    continue
+
+                if alias in failed:
+                    continue
+                if kind == "error":
+                    failed.add(alias)
+                    self._record_failure(alias, payload)
+                    if all(a in failed for a in started) and not launch_next():
+                        raise ProviderUnavailableError(payload)
+                    continue
+
+                winner = alias
+                self._record_success(alias, time.monotonic() - started[alias])
+                for other, event in cancelled.items():
+                    if other != winner:
+                        event.set()
+                if winner != primary:
+                    yield f"<span style='color:orange'>⚠️ {primary} is slow or unavailable, answered by {winner}</span><br>"
+                if kind == "done":
+                    return
+                yield payload
+
+            while True:
+                try:
+                    alias, kind, payload = results.get(timeout=self.stream_idle_timeout if deadlines else None)
+                except queue.Empty:
+                    cancelled[winner].set()
+                    self._record_failure(winner, f"stream stalled for {self.stream_idle_timeout:g}s")
+                    raise ProviderUnavailableError(f"{winner} stopped responding")
+                if alias != winner:
+                    continue
+                if kind == "chunk":
+                    yield payload
+                elif kind == "done":
+                    return
+                else:
+                    self._record_failure(winner, payload)
+                    raise ProviderUnavailableError(payload)
+        finally:
+            # Also runs when the consumer closes the generator (e.g. a Streamlit rerun or stop)
+            for event in cancelled.values():
+                event.set()
@@ -0,0 +1,206 @@
+"""
+Shared resource module for DigiTwin Analytics
+Reference-counted, memory-accounted cache of heavy objects shared across Streamlit sessions
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+import streamlit as st
+from utils import logger
+from config import SHARED_MEMORY_BUDGET_MB, SESSION_IDLE_TIMEOUT
+
+# Holder id for resources preloaded after first paint; released like an idle session
+WARMUP_HOLDER = "warmup"
+
+class _Entry:
+    def __init__(self, kind, value, size):
+        self.kind = kind
+        self.value = value
+        self.size = size
+        self.sessions = set()
+        self.last_used = time.monotonic()
+
+def _faiss_index_size(index):
+    """Approximate memory of a FAISS index from its vector count and code size, without copying it"""
+    if hasattr(index, "hnsw"):  # flat storage plus 2*M level-0 neighbour ids per vector
+        return index.ntotal * (index.storage.sa_code_size() + 4 * index.hnsw.nb_neighbors(0))
+    if hasattr(index, "nlist"):  # codes and ids in the inverted lists plus coarse (and PQ) centroids
+        size = index.ntotal * (index.code_size + 8) + index.nlist * index.d * 4
+        if hasattr(index, "pq"):
+            size += index.pq.ksub * index.d * 4
+        return size
+    return index.ntotal * index.sa_code_size()
+
+def estimate_size(value):
+    """Best-effort resident size in bytes of the objects this app shares"""
+    if isinstance(value, tuple):
+        return sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):  # system-prompt caches by prompt type
+        return sum(estimate_size(item) for item in value.values())
+    if hasattr(value, "memory_usage"):  # pandas DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, "nbytes"):  # numpy arrays, NotificationIndex
+        return int(value.nbytes)
+    if hasattr(value, "model_path") and hasattr(value, "model_save_dir"):  # optimum ORTModel, weights from its ONNX files
+        directory = os.path.dirname(str(value.model_path))
+        return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory) if ".onnx" in name)
+    if hasattr(value, "get_memory_footprint"):  # transformers model
+        return int(value.get_memory_footprint())
+    if hasattr(value, "index") and hasattr(value, "docstore"):  # langchain FAISS vectorstore
+        texts = sum(len(doc.page_content) for doc in value.docstore._dict.values())
+        return int(_faiss_index_size(value.index)) + texts
+    if hasattr(value, "client") and hasattr(value.client, "parameters"):  # HuggingFaceEmbeddings
+        return sum(p.numel() * p.element_size() for p in value.client.parameters())
+    if hasattr(value, "to_legacy_cache"):  # transformers DynamicCache
+        value = value.to_legacy_cache()
+    if isinstance(value, (list, tuple)) or hasattr(value, "element_size"):
+        stack, total = [value], 0
+        while stack:
+            item = stack.pop()
+            if hasattr(item, "element_size"):
+                total += item.numel() * item.element_size()
+            elif isinstance(item, (list, tuple)):
+                stack.extend(item)
+        return total
+    return 0
+
+class SharedResourceManager:
+    """Shares heavy objects (embedders, models, vectorstores, parsed frames) across sessions.
+
+    Each entry is built once per key, counts the sessions that hold it, and is
+    accounted for by its estimated size. A session holds at most one entry per
+    named slot, so switching uploads or agents releases the previous one.
+    Entries no session holds are evicted least-recently-used first once the
+    memory budget is exceeded; sessions idle longer than the timeout are released.
+    """
+
+    def __init__(self, memory_budget_bytes, session_idle_timeout):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.session_idle_timeout = session_idle_timeout
+        self._entries = OrderedDict()
+        self._build_locks = {}
+        self._slots = {}  # session_id -> {slot: key}
+        self._last_seen = {}  # session_id -> monotonic time
+        self._lock = threading.Lock()
+
+    def get(self, key, factory, kind):
+        """Return the shared object for key, building it if needed, without holding it"""
+        return self._get(key, factory, kind)
+
+    def acquire(self, session_id, slot, key, factory, kind):
+        """Return the shared object for key and hold it for session_id in the given slot"""
+        return self._get(key, factory, kind, holder=(session_id, slot))
+
+    def _get(self, key, factory, kind, holder=None):
+        """Look up or build an entry; a holder is recorded under the same lock the entry is returned in,
+        so the entry cannot be evicted in between"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(key)
+                self._hold(holder, key, entry)
+                return entry.value
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        # Build outside the main lock; concurrent requests for the same key wait here
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._hold(holder, key, entry)
+                    return entry.value
+            start = time.perf_counter()
+            value = factory()
+            entry = _Entry(kind, value, estimate_size(value))
+            logger.info(f"Built shared {kind} {key} ({entry.size / 2 ** 20:.0f} MB) in {time.perf_counter() - start:.1f}s")
+            with self._lock:
+                self._entries[key] = entry
+                self._build_locks.pop(key, None)
+                self._hold(holder, key, entry)
+                if self._evict(keep=key) > self.memory_budget_bytes:
+                    logger.warning(f"Shared resources exceed the memory budget after building {kind} {key}; "
+                                   "all other entries are held by active sessions")
+            return value
+
+    def _hold(self, holder, key, entry):
+        """Record that a session holds key in a slot, releasing what the slot held before; caller holds the lock"""
+        if holder is None:
+            return
+        session_id, slot = holder
+        self._last_seen[session_id] = time.monotonic()
+        slots = self._slots.setdefault(session_id, {})
+        previous = slots.get(slot)
+        if previous != key:
+            if previous is not None:
+                self._unhold(session_id, previous)
+            slots[slot] = key
+        entry.sessions.add(session_id)
+        self._evict()
+
+    def release(self, session_id, slot):
+        """Stop holding whatever the session holds in a slot"""
+        with self._lock:
+            key = self._slots.get(session_id, {}).pop(slot, None)
+            if key is not None:
+                self._unhold(session_id, key)
+            self._evict()
+
+    def touch_session(self, session_id):
+        """Mark a session as active and release sessions that have gone idle"""
+        now = time.monotonic()
+        with self._lock:
+            self._last_seen[session_id] = now
+            idle = [sid for sid, seen in self._last_seen.items() if now - seen > self.session_idle_timeout]
+            for sid in idle:
+                for key in self._slots.pop(sid, {}).values():
+                    self._unhold(sid, key)
+                del self._last_seen[sid]
+            if idle:
+                logger.info(f"Released {len(idle)} idle sessions")
+                self._evict()
+
+    def stats(self):
+        """Memory and reference counts per entry and per kind"""
+        with self._lock:
+            entries = [
+                {"kind": entry.kind, "key": str(key), "sessions": len(entry.sessions), "bytes": entry.size}
+                for key, entry in self._entries.items()
+            ]
+            return {
+                "total_bytes": sum(entry["bytes"] for entry in entries),
+                "budget_bytes": self.memory_budget_bytes,
+                "sessions": len(self._last_seen) - (WARMUP_HOLDER in self._last_seen),
+                "entries": entries,
+            }
+
+    def _unhold(self, session_id, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.sessions.discard(session_id)
+
+    def _evict(self, keep=None):
+        """Drop least-recently-used unheld entries until within the memory budget; returns the total size"""
+        total = sum(entry.size for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.memory_budget_bytes:
+                break
+            entry = self._entries[key]
+            if not entry.sessions and key != keep:
+                del self._entries[key]
+                total -= entry.size
+                logger.info(f"Evicted shared {entry.kind} {key} ({entry.size / 2 ** 20:.0f} MB)")
+        return total
+
+@st.cache_resource
+def get_resource_manager():
+    """Process-wide resource manager shared by all sessions"""
+    return SharedResourceManager(SHARED_MEMORY_BUDGET_MB * 2 ** 20, SESSION_IDLE_TIMEOUT)
+
+def current_session_id():
+    """Id of the Streamlit session running this script, or None outside a session"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
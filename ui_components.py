@@ -3,6 +3,7 @@ UI Components module for DigiTwin Analytics
 Contains Streamlit interface elements and tab components
 """
 
+import time
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -71,6 +72,37 @@ def setup_sidebar():
     
     return model_alias, uploaded_files, prompt_type, selected_fpso
 
+def render_provider_health(stats):
+    """Show rolling per-agent latency, error rate and circuit state in the sidebar"""
+    with st.sidebar.expander("📡 Agent Health", expanded=False):
+        if not stats:
+            st.write("No requests yet.")
+            return
+        rows = []
+        for alias, agent_stats in stats.items():
+            rows.append({
+                "Agent": alias,
+                "State": agent_stats["state"],
+                "Requests": agent_stats["requests"],
+                "Errors": f"{agent_stats['error_rate']:.0%}",
+                "TTFT p50 (s)": None if agent_stats["ttft_p50"] is None else round(agent_stats["ttft_p50"], 2),
+                "TTFT p95 (s)": None if agent_stats["ttft_p95"] is None else round(agent_stats["ttft_p95"], 2)
+            })
+        st.dataframe(pd.DataFrame(rows).set_index("Agent"))
+        for alias, agent_stats in stats.items():
+            if agent_stats["state"] != "closed" and agent_stats["last_error"]:
+                st.caption(f"{alias}: {agent_stats['last_error']}")
+
+def render_shared_resources(stats):
+    """Show memory used by resources shared across sessions in the sidebar"""
+    with st.sidebar.expander("🧠 Shared Resources", expanded=False):
+        st.write(f"{stats['total_bytes'] / 2 ** 20:.0f} MB of {stats['budget_bytes'] / 2 ** 20:.0f} MB, "
+                 f"{stats['sessions']} active sessions")
+        if stats["entries"]:
+            entries = pd.DataFrame(stats["entries"])
+            entries["MB"] = (entries.pop("bytes") / 2 ** 20).round(1)
+            st.dataframe(entries.set_index("kind"))
+
 def initialize_session_state():
     """Initialize Streamlit session state variables"""
     for key in ["vectorstore", "chat_history", "model_intro_done", "current_model", "current_prompt"]:
@@ -192,9 +224,31 @@ def render_fpso_layout_tab(df, selected_fpso):
     else:
         st.write("Please upload files to view the FPSO layout.")
 
-def render_all_tabs(df, selected_fpso, generate_response_func):
+def render_drilldown_tab(notification_index):
+    """Render the notification drill-down tab"""
+    st.subheader("Notification Drill-down")
+    if notification_index is not None:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            fpso = st.multiselect("FPSO", notification_index.values('fpso'))
+            notif_type = st.multiselect("Notification Type", notification_index.values('notif_type'))
+        with col2:
+            keyword = st.multiselect("Keyword", notification_index.values('keyword'))
+            location = st.multiselect("Location", notification_index.values('location'))
+        with col3:
+            month = st.multiselect("Month", notification_index.values('month'))
+        
+        start = time.perf_counter()
+        rows = notification_index.rows(fpso=fpso, notif_type=notif_type, keyword=keyword, location=location, month=month)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        st.write(f"Matching notifications: {len(rows)} ({elapsed_ms:.1f} ms)")
+        st.dataframe(rows)
+    else:
+        st.write("Please upload a notifications file to drill down.")
+
+def render_all_tabs(df, selected_fpso, generate_response_func, notification_index=None):
     """Render all tabs"""
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Chat", "NI Notifications", "NC Notifications", "Summary Stats", "FPSO Layout"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Chat", "NI Notifications", "NC Notifications", "Summary Stats", "FPSO Layout", "Drill-down"])
     
     with tab1:
         render_chat_tab(df, generate_response_func)
@@ -209,4 +263,7 @@ def render_all_tabs(df, selected_fpso, generate_response_func):
         render_summary_stats_tab(df)
     
     with tab5:
-        render_fpso_layout_tab(df, selected_fpso) 
\ No newline at end of file
+        render_fpso_layout_tab(df, selected_fpso)
+    
+    with tab6:
+        render_drilldown_tab(notification_index) 
\ No newline at end of file
@@ -3,20 +3,26 @@ Utilities module for DigiTwin Analytics
 Contains common functions, decorators, and data processing utilities
 """
 
+import hashlib
+import io
+import itertools
 import logging
+import threading
+import time
 import pandas as pd
 from functools import wraps
 from PyPDF2 import PdfReader
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.schema import Document as LCDocument
 import streamlit as st
 from config import (
     NI_keywords, NC_keywords, module_keywords, rack_keywords, 
     living_quarters_keywords, flare_keywords, fwd_keywords, hexagons_keywords,
-    NI_keyword_map, NC_keyword_map
+    NI_keyword_map, NC_keyword_map, EMBEDDING_MODEL, VECTOR_INDEX_TYPE, EMBEDDING_BATCH_SIZE, CHUNKS_PER_PAGE_ESTIMATE,
+    NOTIFICATION_STORE_PATH
 )
+from notification_store import NotificationStore, ID_COLUMN
+from notification_index import NotificationIndex
+# The langchain / FAISS / sentence-transformers stack is imported inside the
+# functions that need it so that app start-up does not pay for it.
 
 # PAZ-specific keywords for data processing
 paz_module_keywords = ['P1', 'P2', 'P3', 'P4', 'P5', 'P6', 'P7', 'P8', 'S1', 'S2', 'S3', 'S4', 'S5', 'S6', 'S7', 'S8']
@@ -48,23 +54,108 @@ def log_execution(func):
             raise
     return wrapper
 
+# --- BACKGROUND WARM-UP ---
+_warmup_started = set()
+_warmup_lock = threading.Lock()
+
+def start_background_warmup(tasks):
+    """Run warm-up callables in a daemon thread, each at most once per process.
+
+    ``tasks`` maps a name to a zero-argument callable. Failures are logged and
+    otherwise ignored; the foreground path loads the resource on demand.
+    """
+    with _warmup_lock:
+        pending = {name: task for name, task in tasks.items() if name not in _warmup_started}
+        _warmup_started.update(pending)
+    if not pending:
+        return None
+
+    def _run():
+        for name, task in pending.items():
+            start = time.perf_counter()
+            try:
+                task()
+                logger.info(f"Warm-up of {name} finished in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                logger.warning(f"Warm-up of {name} failed: {str(e)}")
+
+    thread = threading.Thread(target=_run, name="digitwin-warmup", daemon=True)
+    thread.start()
+    return thread
+
 # --- DATA PROCESSING FUNCTIONS ---
+def iter_pdf_pages(file):
+    """Yield (page_number, text) for each page of a PDF that has extractable text"""
+    reader = PdfReader(file)
+    for page_number, page in enumerate(reader.pages, start=1):
+        text = page.extract_text()
+        if text:
+            yield page_number, text
+
 @log_execution
 def parse_pdf(file):
     """Parse PDF file and extract text content"""
-    reader = PdfReader(file)
-    return "\n".join([page.extract_text() for page in reader.pages if page.extract_text()])
+    return "\n".join(text for _, text in iter_pdf_pages(file))
 
-@st.cache_resource
-def build_faiss_vectorstore(_docs):
-    """Build FAISS vectorstore from documents with caching"""
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+def iter_pdf_chunks(files, splitter):
+    """Stream PDF files page by page through the splitter, yielding chunk documents"""
+    from langchain.schema import Document as LCDocument
+    for i, file in enumerate(files):
+        for page_number, text in iter_pdf_pages(file):
+            for chunk in splitter.split_text(text):
+                yield LCDocument(page_content=chunk, metadata={"source": f"doc_{i}", "name": file.name, "page": page_number})
+
+def batched(iterable, size):
+    """Yield lists of up to size items from an iterable"""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def file_digest(file):
+    """Content hash of an uploaded file, used as a cache key"""
+    return hashlib.sha256(file.getvalue()).hexdigest()
+
+def get_embeddings():
+    """Return the sentence-transformers embedder shared by all sessions"""
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from resource_manager import get_resource_manager
+    return get_resource_manager().get(
+        ("embedder", EMBEDDING_MODEL), lambda: HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL), "embedder"
+    )
+
+def build_faiss_vectorstore(files):
+    """Build FAISS vectorstore from PDF files.
+
+    Pages stream through the splitter into fixed-size embedding batches that are
+    added to the index as they are produced (IVF indexes train on a sample of
+    the whole stream first), so peak memory does not grow with the size of a
+    single document.
+    """
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from vector_index import StreamingIndexBuilder
+    embeddings = get_embeddings()
     splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    chunks = []
-    for i, doc in enumerate(_docs):
-        for chunk in splitter.split_text(doc.page_content):
-            chunks.append(LCDocument(page_content=chunk, metadata={"source": f"doc_{i}"}))
-    return FAISS.from_documents(chunks, embeddings)
+    
+    # The index type is chosen up front from the page count
+    expected_chunks = sum(len(PdfReader(f).pages) for f in files) * CHUNKS_PER_PAGE_ESTIMATE
+    builder = StreamingIndexBuilder(len(embeddings.embed_query("dimension probe")), expected_chunks)
+    docstore = InMemoryDocstore()
+    index_to_docstore_id = {}
+    for batch in batched(iter_pdf_chunks(files, splitter), EMBEDDING_BATCH_SIZE):
+        builder.add(np.asarray(embeddings.embed_documents([chunk.page_content for chunk in batch]), dtype="float32"))
+        ids = [str(len(index_to_docstore_id) + i) for i in range(len(batch))]
+        docstore.add(dict(zip(ids, batch)))
+        index_to_docstore_id.update({int(doc_id): doc_id for doc_id in ids})
+    return FAISS(embeddings, builder.finish(), docstore, index_to_docstore_id)
+
+def acquire_vectorstore(session_id, files):
+    """Vectorstore for a set of PDF uploads, shared by sessions that uploaded identical files"""
+    from resource_manager import get_resource_manager
+    key = ("vectorstore", VECTOR_INDEX_TYPE, *(file_digest(f) for f in files))
+    return get_resource_manager().acquire(session_id, "vectorstore", key, lambda: build_faiss_vectorstore(files), "vectorstore")
 
 @log_execution
 def preprocess_keywords(description):
@@ -129,49 +220,91 @@ def apply_fpso_colors(df):
             styles.loc[fpso] = f'background-color: {color}'
     return styles
 
+class MissingColumnsError(ValueError):
+    """Raised when a notifications export lacks required columns"""
+    def __init__(self, columns):
+        super().__init__(f"Missing columns: {columns}")
+        self.columns = columns
+
+# Stored enrichments are reused only while the keyword lists and maps they were extracted with are unchanged
+ENRICHMENT_VERSION = hashlib.sha1(repr((
+    NI_keywords, NC_keywords, module_keywords, rack_keywords, living_quarters_keywords, flare_keywords,
+    fwd_keywords, hexagons_keywords, paz_module_keywords, paz_rack_keywords,
+    sorted(NI_keyword_map.items()), sorted(NC_keyword_map.items())
+)).encode("utf-8")).hexdigest()[:12]
+
+@st.cache_resource
+def get_notification_store():
+    """Open the persistent notification store once per process"""
+    return NotificationStore(NOTIFICATION_STORE_PATH)
+
+@log_execution
+def enrich_notifications(df):
+    """Add NI/NC keyword and location columns to a notifications frame"""
+    df['Extracted_Keywords'] = df.apply(extract_ni_nc_keywords, axis=1, args=('Notifictn type', 'Description'))
+    for loc_type, keywords in [
+        ('Modules', module_keywords + paz_module_keywords), ('Racks', rack_keywords + paz_rack_keywords), ('LivingQuarters', living_quarters_keywords),
+        ('Flare', flare_keywords), ('FWD', fwd_keywords), ('HeliDeck', hexagons_keywords)
+    ]:
+        df[f'Extracted_{loc_type}'] = df.apply(extract_location_keywords, axis=1, args=('Description', keywords))
+    return df
+
+def load_notifications(file_bytes):
+    """Read a Global Notifications export, enrich it and index it for drill-down queries.
+
+    Across days the store only enriches rows that are new or changed since the
+    previous export. Returns the enriched frame and its NotificationIndex.
+    """
+    df = pd.read_excel(io.BytesIO(file_bytes), sheet_name='Global Notifications')
+    df.columns = df.columns.str.strip()
+    expected_columns = {
+        'Notifictn type': 'Notifictn type',
+        'Created on': 'Created on',
+        'Description': 'Description',
+        'FPSO': 'FPSO'
+    }
+    missing_columns = [col for col in expected_columns.values() if col not in df.columns]
+    if missing_columns:
+        raise MissingColumnsError(missing_columns)
+    
+    # Keep the notification number when present; the store uses it as row identity
+    id_columns = [ID_COLUMN] if ID_COLUMN in df.columns else []
+    df = df[list(expected_columns.values()) + id_columns]
+    df.columns = list(expected_columns.keys()) + id_columns
+    df = df[df['FPSO'].isin(['GIR', 'DAL', 'PAZ', 'CLV'])]
+    df = get_notification_store().sync(df, enrich_notifications, ENRICHMENT_VERSION)
+    return df, NotificationIndex(df)
+
+def acquire_notifications(session_id, file):
+    """Enriched notifications frame and index for an upload, shared read-only by sessions that uploaded the same file"""
+    from resource_manager import get_resource_manager
+    key = ("notifications", file_digest(file))
+    return get_resource_manager().acquire(session_id, "notifications", key, lambda: load_notifications(file.getvalue()), "frame")
+
 @log_execution
-def process_uploaded_files(files):
-    """Process uploaded files and return PDF documents and Excel dataframe"""
+def process_uploaded_files(files, session_id):
+    """Process uploaded files and return PDF files, Excel dataframe and its notification index"""
+    from resource_manager import get_resource_manager
     pdf_files = [f for f in files if f.type == "application/pdf"]
     excel_files = [f for f in files if f.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]
     
-    # Process PDF files
-    parsed_docs = []
-    if pdf_files:
-        parsed_docs = [LCDocument(page_content=parse_pdf(f), metadata={"name": f.name}) for f in pdf_files]
-        st.sidebar.success(f"{len(parsed_docs)} PDF reports indexed.")
+    # PDF files are parsed lazily by build_faiss_vectorstore
     
     # Process Excel files
     df = None
+    notification_index = None
     if excel_files:
         try:
             # Use the first Excel file if multiple are uploaded
             uploaded_xlsx = excel_files[0]
-            df = pd.read_excel(uploaded_xlsx, sheet_name='Global Notifications')
-            df.columns = df.columns.str.strip()
-            expected_columns = {
-                'Notifictn type': 'Notifictn type',
-                'Created on': 'Created on',
-                'Description': 'Description',
-                'FPSO': 'FPSO'
-            }
-            missing_columns = [col for col in expected_columns.values() if col not in df.columns]
-            if missing_columns:
-                st.error(f"Missing columns: {missing_columns}")
-                return parsed_docs, None
-            
-            df = df[list(expected_columns.values())]
-            df.columns = list(expected_columns.keys())
-            df = df[df['FPSO'].isin(['GIR', 'DAL', 'PAZ', 'CLV'])]
-            df['Extracted_Keywords'] = df.apply(extract_ni_nc_keywords, axis=1, args=('Notifictn type', 'Description'))
-            for loc_type, keywords in [
-                ('Modules', module_keywords + paz_module_keywords), ('Racks', rack_keywords + paz_rack_keywords), ('LivingQuarters', living_quarters_keywords),
-                ('Flare', flare_keywords), ('FWD', fwd_keywords), ('HeliDeck', hexagons_keywords)
-            ]:
-                df[f'Extracted_{loc_type}'] = df.apply(extract_location_keywords, axis=1, args=('Description', keywords))
+            df, notification_index = acquire_notifications(session_id, uploaded_xlsx)
             st.sidebar.success("Excel file processed successfully.")
+        except MissingColumnsError as e:
+            st.error(f"Missing columns: {e.columns}")
         except Exception as e:
             st.error(f"Error processing Excel: {e}")
-            return parsed_docs, None
     
-    return parsed_docs, df 
\ No newline at end of file
+    # Let go of a previously shared frame once this session no longer shows it
+    if df is None:
+        get_resource_manager().release(session_id, "notifications")
+    return pdf_files, df, notification_index
@@ -0,0 +1,136 @@
+"""
+Vector index module for DigiTwin Analytics
+Chooses and builds FAISS index types (flat, IVF-Flat, HNSW, IVF-PQ) by corpus size
+"""
+
+import math
+import tempfile
+import numpy as np
+from utils import logger
+from config import VECTOR_INDEX_TYPE, FLAT_MAX_VECTORS
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# FAISS wants roughly this many training points per centroid / PQ code
+TRAINING_POINTS_PER_CENTROID = 39
+# Upper bound on vectors held in memory for training (~75 MB at 384 dimensions)
+MAX_TRAINING_VECTORS = 50000
+PQ_BITS = 8
+
+def choose_index_type(n_vectors, index_type=VECTOR_INDEX_TYPE):
+    """Resolve 'auto' to a concrete index type for a corpus of n_vectors"""
+    if index_type == "auto":
+        # IVF-PQ trades too much recall without re-ranking, so it stays opt-in
+        index_type = "flat" if n_vectors <= FLAT_MAX_VECTORS else "hnsw"
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown vector index type {index_type}")
+    # Trained indexes need enough vectors for k-means; fall back to exact search otherwise
+    if index_type.startswith("ivf") and n_vectors < training_size(index_type, n_vectors):
+        logger.warning(f"{n_vectors} vectors are too few to train {index_type}, using flat index")
+        index_type = "flat"
+    return index_type
+
+def ivf_nlist(n_vectors):
+    """Number of IVF cells: ~4*sqrt(n), bounded so each cell gets enough training points"""
+    trainable = min(n_vectors, MAX_TRAINING_VECTORS)
+    return max(1, min(int(4 * math.sqrt(n_vectors)), trainable // TRAINING_POINTS_PER_CENTROID))
+
+def ivf_nprobe(nlist):
+    """Number of IVF cells visited per query"""
+    return min(nlist, max(8, nlist // 32))
+
+def pq_subquantizers(dim):
+    """Largest divisor of dim giving sub-vectors of at least 8 dimensions"""
+    return max(m for m in range(1, dim // 8 + 1) if dim % m == 0)
+
+def training_size(index_type, n_vectors):
+    """Number of vectors needed to train an index of this type (0 if untrained)"""
+    if index_type == "ivf_flat":
+        return TRAINING_POINTS_PER_CENTROID * ivf_nlist(n_vectors)
+    if index_type == "ivf_pq":
+        return TRAINING_POINTS_PER_CENTROID * max(ivf_nlist(n_vectors), 2 ** PQ_BITS)
+    return 0
+
+def create_faiss_index(index_type, dim, n_vectors):
+    """Create an (untrained) L2 FAISS index of the given type sized for n_vectors"""
+    import faiss
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, 32)
+        index.hnsw.efConstruction = 80
+        index.hnsw.efSearch = 64
+        return index
+
+    nlist = ivf_nlist(n_vectors)
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+    else:
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_subquantizers(dim), PQ_BITS)
+    index.nprobe = ivf_nprobe(nlist)
+    return index
+
+class StreamingIndexBuilder:
+    """Adds embedding batches to a FAISS index as they arrive.
+
+    Untrained index types go straight into the index. Index types that need
+    training keep a reservoir sample of training_size vectors drawn uniformly
+    from the whole stream and spill every vector to a temporary file; at finish
+    the index is trained on the sample and the spilled vectors are added in
+    batches. Memory stays bounded however many vectors are streamed through,
+    and vectors keep their arrival order, so the i-th vector added is at index
+    position i.
+    """
+
+    def __init__(self, dim, expected_vectors, index_type=VECTOR_INDEX_TYPE, seed=0):
+        self.dim = dim
+        self.index_type = choose_index_type(expected_vectors, index_type)
+        self.index = create_faiss_index(self.index_type, dim, expected_vectors)
+        self._training_size = training_size(self.index_type, expected_vectors)
+        self._rng = np.random.default_rng(seed)
+        self._sample = np.empty((self._training_size, dim), dtype="float32")
+        self._seen = 0
+        self._spill = None if self.index.is_trained else tempfile.TemporaryFile()
+
+    def add(self, vectors):
+        """Add a float32 batch, or sample and spill it while the index is untrained"""
+        if self._spill is None:
+            self.index.add(vectors)
+            return
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        vectors.tofile(self._spill)
+        self._reservoir_update(vectors)
+
+    def finish(self):
+        """Train on the sample and add the spilled vectors, falling back to flat if there are too few to train"""
+        if self._spill is not None:
+            if self._seen < self._training_size:
+                logger.warning(f"{self._seen} vectors are too few to train {self.index_type}, using flat index")
+                self.index_type = "flat"
+                self.index = create_faiss_index("flat", self.dim, self._seen)
+            else:
+                self.index.train(self._sample)
+            self._sample = None
+            self._spill.seek(0)
+            batch_size = max(1, MAX_TRAINING_VECTORS // 4)
+            for start in range(0, self._seen, batch_size):
+                count = min(batch_size, self._seen - start)
+                self.index.add(np.fromfile(self._spill, dtype="float32", count=count * self.dim).reshape(count, self.dim))
+            self._spill.close()
+            self._spill = None
+        logger.info(f"Built {self.index_type} index over {self.index.ntotal} vectors")
+        return self.index
+
+    def _reservoir_update(self, vectors):
+        """Algorithm R: keep a uniform sample of training_size vectors from everything seen so far"""
+        fill = min(len(vectors), max(0, self._training_size - self._seen))
+        self._sample[self._seen:self._seen + fill] = vectors[:fill]
+        rest = vectors[fill:]
+        if len(rest):
+            positions = self._seen + fill + np.arange(len(rest))
+            slots = (self._rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+            keep = slots < self._training_size
+            # Later vectors win when several land in the same slot, as in the sequential algorithm
+            self._sample[slots[keep]] = rest[keep]
+        self._seen += len(vectors)